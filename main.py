@@ -4,7 +4,7 @@ import os
 import asyncio
 import traceback
 
-from modules.google_sheets import save_to_google_sheet, load_settings
+from modules.google_sheets import save_to_google_sheet, load_settings, get_scheduler
 from dotenv import load_dotenv
 from loguru import logger
 from playwright.async_api import async_playwright
@@ -12,6 +12,9 @@ from playwright.async_api import async_playwright
 import pandas as pd
 
 from modules.web_scraping import scrape_ebay_listings
+from modules.cpu_offload import (LoopLagMonitor, configure_cpu_pool, get_cpu_pool, PARSE_POOL, PARSE_WORKERS,
+                                 PARSE_QUEUE, LOOP_LAG_THRESHOLD)
+from modules.service import JOB_OPTIONS, DEFAULT_SOCKET, serve, submit_job
 
 # --- Load Environment Variables ---
 load_dotenv()
@@ -27,6 +30,8 @@ async def main(args):
     SPREADSHEET_ID = settings.get('SPREADSHEET_ID', os.getenv("SPREADSHEET_ID")) or None
     SHEET_NAME = settings.get('SHEET_NAME', os.getenv("SHEET_NAME")) or "eBay Laptops"
     search_query = os.getenv("SEARCH_QUERY") or input("Enter your eBay search query: ")
+    lag_monitor = LoopLagMonitor(args.lag_threshold)
+    lag_monitor.start()
     try:
         logger.info(f"Search query: {search_query}")
         async with async_playwright() as p:
@@ -49,6 +54,7 @@ async def main(args):
                 await save_to_google_sheet(None, SHEET_NAME, laptops_data)
             else:
                 await save_to_google_sheet(SPREADSHEET_ID, SHEET_NAME, laptops_data)
+            await get_scheduler().close()
             await browser.close()
     except Exception as e:
         logger.error(f"Error: {e}")
@@ -56,6 +62,15 @@ async def main(args):
     finally:
         if 'browser' in locals():
             await browser.close()
+        await lag_monitor.stop()
+        logger.info(f"Parse pool: {get_cpu_pool().stats}")
+        get_cpu_pool().shutdown()
+
+async def submit(args):
+    """Sends a scrape job to a running service and prints the events it streams back."""
+    request = {'query': args.submit, 'options': {key: getattr(args, key) for key in JOB_OPTIONS}}
+    async for event in submit_job(request, socket_path=args.socket, host=args.host, port=args.port):
+        print(json.dumps(event, ensure_ascii=False))
 
 async def setup_browser(p, without_browser=False):
     logger.info("Launching browser...")
@@ -100,6 +115,31 @@ if __name__ == "__main__":
                         choices=['Price + Shipping: lowest first', 'Price + Shipping: highest first',
                                  'Price: lowest first', 'Price: highest first', 'Ending soonest', 'Newly listed'],
                         help='Sorting order for price (default: Price + Shipping: lowest first)')
+    # Service mode
+    parser.add_argument('--serve', action='store_true', default=False,
+                        help='Run as a long-lived service that keeps the browser, models and Sheets client warm')
+    parser.add_argument('--submit', type=str, default=None, metavar='QUERY',
+                        help='Send a scrape job for QUERY to a running service and stream the results')
+    parser.add_argument('--socket', type=str, default=DEFAULT_SOCKET,
+                        help=f'Unix socket of the service (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Service host when --port is set (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=None, help='Serve over TCP on this port instead of the Unix socket')
+    parser.add_argument('--workers', type=int, default=2, help='Number of pooled browser contexts in service mode (default: 2)')
+    # CPU-bound parsing
+    parser.add_argument('--parse-pool', choices=['thread', 'process'], default=PARSE_POOL,
+                        help=f'Pool for HTML/NLP/regex parsing off the event loop (default: {PARSE_POOL})')
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                        help=f'Number of parsing workers (default: {PARSE_WORKERS})')
+    parser.add_argument('--parse-queue', type=int, default=PARSE_QUEUE,
+                        help=f'Parsing tasks allowed to wait for a worker (default: {PARSE_QUEUE})')
+    parser.add_argument('--lag-threshold', type=float, default=LOOP_LAG_THRESHOLD,
+                        help=f'Report event loop blocking spans longer than this many seconds (default: {LOOP_LAG_THRESHOLD})')
     args = parser.parse_args()
-    asyncio.run(main(args))
+    configure_cpu_pool(args.parse_pool, args.parse_workers, args.parse_queue)
+    if args.serve:
+        asyncio.run(serve(args))
+    elif args.submit:
+        asyncio.run(submit(args))
+    else:
+        asyncio.run(main(args))
 
@@ -0,0 +1,151 @@
+# modules/cpu_offload.py
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from loguru import logger
+
+# --- Defaults (override with environment variables or command-line options) ---
+PARSE_POOL = os.getenv("PARSE_POOL", "thread")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+PARSE_QUEUE = int(os.getenv("PARSE_QUEUE", 32))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", 0.1))
+
+
+class CpuPool:
+    """Runs synchronous CPU-bound work (HTML parsing, spaCy) off the event loop.
+
+    At most ``workers + queue_size`` tasks are submitted at once; further callers
+    wait on the loop until a slot frees up, so a burst of fallback parses cannot
+    pile up unbounded work.
+
+    Args:
+        kind (str): 'thread' or 'process'. Process pools are spawned, need picklable,
+            module-level functions and load their own copy of the NLP models.
+        workers (int): Number of worker threads or processes.
+        queue_size (int): Tasks allowed to wait for a free worker.
+    """
+
+    def __init__(self, kind=PARSE_POOL, workers=PARSE_WORKERS, queue_size=PARSE_QUEUE):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = None
+        self._slots = asyncio.Semaphore(workers + queue_size)
+        self._stats = {'tasks': 0, 'wait_seconds': 0.0, 'run_seconds': 0.0}
+
+    @property
+    def stats(self):
+        return dict(self._stats)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == 'process':
+                # Forking after Playwright and the executor threads have started can deadlock
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parse')
+        return self._executor
+
+    async def run(self, func, *args):
+        """Runs ``func(*args)`` in the pool and returns its result."""
+        requested = time.monotonic()
+        async with self._slots:
+            started = time.monotonic()
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        self._stats['tasks'] += 1
+        self._stats['wait_seconds'] += started - requested
+        self._stats['run_seconds'] += time.monotonic() - started
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class LoopLagMonitor:
+    """Reports spans where the event loop was blocked for longer than a threshold.
+
+    A background task sleeps for ``interval`` seconds and measures how late it
+    wakes up; the delay is time the loop spent running something else without
+    yielding.
+
+    Args:
+        threshold (float): Lag in seconds above which a blocking span is reported.
+        interval (float): Seconds between checks.
+    """
+
+    def __init__(self, threshold=LOOP_LAG_THRESHOLD, interval=0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self._task = None
+        self._expected = None
+        self._stats = {'checks': 0, 'blocked_spans': 0, 'blocked_seconds': 0.0, 'max_lag_seconds': 0.0}
+
+    @property
+    def stats(self):
+        return dict(self._stats)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Count a span that is still blocking the wake-up we are about to cancel
+            if self._expected is not None and time.monotonic() > self._expected:
+                self._record(time.monotonic() - self._expected)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info(f"Event loop lag: {self.stats}")
+
+    async def _run(self):
+        while True:
+            self._expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._expected
+            self._expected = None
+            self._record(lag)
+
+    def _record(self, lag):
+        self._stats['checks'] += 1
+        self._stats['max_lag_seconds'] = max(self._stats['max_lag_seconds'], lag)
+        if lag > self.threshold:
+            self._stats['blocked_spans'] += 1
+            self._stats['blocked_seconds'] += lag
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+
+_pool = None
+
+
+def configure_cpu_pool(kind=PARSE_POOL, workers=PARSE_WORKERS, queue_size=PARSE_QUEUE):
+    """Replaces the shared pool used by the data extraction functions."""
+    global _pool
+    pool = CpuPool(kind, workers, queue_size)
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = pool
+    return _pool
+
+
+def get_cpu_pool():
+    """Returns the shared pool, creating it with the default settings on first use."""
+    if _pool is None:
+        configure_cpu_pool()
+    return _pool
+
+
+async def run_cpu_bound(func, *args):
+    """Runs ``func(*args)`` in the shared pool."""
+    return await get_cpu_pool().run(func, *args)
@@ -3,6 +3,7 @@ import traceback
 
 from loguru import logger
 
+from modules.cpu_offload import run_cpu_bound
 from modules.natural_language_processor import NaturalLanguageProcessor
 
 nlp = NaturalLanguageProcessor()
@@ -34,16 +35,23 @@ async def extract_data_nlp(listing, element_name):
     """
     logger.error(f'Extracting data nlp for {element_name}...')
     html_content = await listing.content()
+    element_code = await run_cpu_bound(parse_element_nlp, html_content, element_name)
+    if element_code:
+        logger.error(f"Extracted data nlp {element_name}: {element_code}")
+        return element_code
+    else:
+        return "N/A"
+
+
+def parse_element_nlp(html_content, element_name):
+    """Synchronous part of ``extract_data_nlp``; runs in the CPU pool."""
     soup = nlp.clean_html(html_content)
     text = nlp.extract_relevant_text(soup, element_name)
     tokens = nlp.process_text(text)
     element = nlp.find_element(element_name, tokens)
     if element:
-        element_code = nlp.get_element_code(soup, element)
-        logger.error(f"Extracted data nlp {element_name}: {element_code}")
-        return element_code
-    else:
-        return "N/A"
+        return nlp.get_element_code(soup, element)
+    return None
 
 
 async def extract_element(listing, css_selector, element_name):
@@ -1,10 +1,15 @@
 # google_sheets.py
+import asyncio
 import json
 import os
+import random
+import time
 import traceback
+from collections import deque
 
 import gspread
 import gspread_asyncio
+import requests
 from google.oauth2.service_account import Credentials
 from loguru import logger
 from dotenv import load_dotenv
@@ -51,81 +56,320 @@ def get_creds():
     return scoped
 
 
-async def save_to_google_sheet(spreadsheet_id: str | None, sheet_name: str, data):
+# --- Sheets API quota (per user, per minute) ---
+SHEETS_READ_QUOTA = int(os.getenv("SHEETS_READ_QUOTA", 60))
+SHEETS_WRITE_QUOTA = int(os.getenv("SHEETS_WRITE_QUOTA", 60))
+QUOTA_WINDOW = 60.0
+# HTTP status codes that are worth retrying (rate limit and transient server errors)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# Errors after which a cached spreadsheet or worksheet handle may be stale (deleted or renamed)
+STALE_HANDLE_STATUS_CODES = (400, 404)
+
+
+class RequestBudget:
+    """Sliding-window budget for one kind of Sheets API request (read or write)."""
+
+    def __init__(self, limit, window=QUOTA_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._timestamps = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a request fits in the budget and records it.
+
+        Returns:
+            float: Seconds spent waiting for the budget.
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.window:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.limit:
+                    self._timestamps.append(now)
+                    return waited
+                delay = self.window - (now - self._timestamps[0])
+                logger.info(f"Sheets quota exhausted, waiting {delay:.1f}s")
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+def get_status_code(error):
+    """Returns the HTTP status code of a Sheets API error, or None."""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_retryable(error, idempotent):
+    """Tells whether a failed Sheets API request can safely be sent again.
+
+    A 429 means the request was rejected before it was applied. Server errors and
+    read timeouts may arrive after the server already applied it, so they are only
+    retried for idempotent requests; non-idempotent ones (appends, creates) are
+    otherwise retried only when the connection could not be made at all.
+    """
+    status = get_status_code(error)
+    if status == 429:
+        return True
+    if status is not None:
+        return idempotent and status in RETRYABLE_STATUS_CODES
+    if idempotent:
+        return isinstance(error, requests.RequestException)
+    return isinstance(error, (requests.ConnectionError, requests.ConnectTimeout)) \
+        and not isinstance(error, requests.ReadTimeout)
+
+
+class SchedulerClientManager(gspread_asyncio.AsyncioGspreadClientManager):
+    """Client manager that leaves pacing and retries to ``SheetsWriteScheduler``.
+
+    The base class sleeps ``gspread_delay`` between calls and retries 429/5xx and
+    connection errors forever, so the scheduler would never see them.
+    """
+
+    def __init__(self, credentials_fn=None, **kwargs):
+        kwargs.setdefault('gspread_delay', 0)
+        super().__init__(credentials_fn or get_creds, **kwargs)
+
+    async def handle_gspread_error(self, e, method, args, kwargs):
+        raise e
+
+    async def handle_requests_error(self, e, method, args, kwargs):
+        raise e
+
+
+class SheetsWriteScheduler:
+    """Long-lived Google Sheets client that schedules requests within the API quota.
+
+    Rows written to the same worksheet while a flush is pending are coalesced
+    into a single ``append_rows`` call. Requests failing with a rate-limit or
+    transient server error are retried with exponential backoff and jitter.
+
+    Args:
+        client_manager: An object with an async ``authorize()`` method. Defaults
+            to ``SchedulerClientManager``; pass a fake to test the scheduler
+            without Google.
+        read_quota (int): Read requests allowed per quota window.
+        write_quota (int): Write requests allowed per quota window.
+        flush_delay (float): Seconds to wait for more rows before flushing.
+        max_retries (int): Retries for a single request before giving up.
+        base_delay (float): First backoff delay in seconds.
+        max_delay (float): Upper bound for a single backoff delay in seconds.
+        jitter (float): Upper bound for the random delay added to each backoff.
+    """
+
+    def __init__(self, client_manager=None, read_quota=SHEETS_READ_QUOTA, write_quota=SHEETS_WRITE_QUOTA,
+                 flush_delay=1.0, max_retries=5, base_delay=1.0, max_delay=64.0, jitter=1.0):
+        self.client_manager = client_manager or SchedulerClientManager()
+        self.budgets = {'read': RequestBudget(read_quota), 'write': RequestBudget(write_quota)}
+        self.flush_delay = flush_delay
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._pending = {}
+        self._flush_task = None
+        self._started = time.monotonic()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'batches': 0,
+            'rows_written': 0,
+            'throttled_seconds': 0.0,
+        }
+
+    @property
+    def stats(self):
+        """Request, retry and throughput counters since the scheduler was created."""
+        elapsed = time.monotonic() - self._started
+        stats = dict(self._stats)
+        stats['rows_per_second'] = stats['rows_written'] / elapsed if elapsed > 0 else 0.0
+        stats['requests_per_minute'] = stats['requests'] * 60 / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    async def call(self, kind, func, *args, idempotent=None, **kwargs):
+        """Runs one Sheets API request within the ``kind`` ('read' or 'write') budget.
+
+        ``idempotent`` defaults to True for reads and False for writes; see
+        ``is_retryable`` for which errors are retried in each case.
+
+        Raises:
+            Exception: The last error if the request is not retryable or retries run out.
+        """
+        if idempotent is None:
+            idempotent = kind == 'read'
+        attempt = 0
+        while True:
+            self._stats['throttled_seconds'] += await self.budgets[kind].acquire()
+            self._stats['requests'] += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                status = get_status_code(e)
+                if not is_retryable(e, idempotent) or attempt >= self.max_retries:
+                    self._stats['failures'] += 1
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) + random.uniform(0, self.jitter)
+                attempt += 1
+                self._stats['retries'] += 1
+                logger.warning(f"Sheets API request failed ({status or e}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def get_client(self):
+        # The client manager caches the authorized client and refreshes it when it expires
+        return await self.client_manager.authorize()
+
+    async def create_spreadsheet(self, title):
+        """Creates a new spreadsheet that anyone with the URL can edit."""
+        agc = await self.get_client()
+        spreadsheet = await self.call('write', agc.create, title)
+        await self.call('write', agc.insert_permission, spreadsheet.id, None, perm_type="anyone", role="writer",
+                        idempotent=True)
+        self._spreadsheets[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+    async def open_spreadsheet(self, spreadsheet_id):
+        if spreadsheet_id not in self._spreadsheets:
+            agc = await self.get_client()
+            self._spreadsheets[spreadsheet_id] = await self.call('read', agc.open_by_key, spreadsheet_id)
+            logger.info(f"Opened existing Spreadsheet: {self._spreadsheets[spreadsheet_id].title}")
+        return self._spreadsheets[spreadsheet_id]
+
+    async def open_worksheet(self, spreadsheet_id, sheet_name):
+        key = (spreadsheet_id, sheet_name)
+        if key not in self._worksheets:
+            spreadsheet = await self.open_spreadsheet(spreadsheet_id)
+            try:
+                worksheet = await self.call('read', spreadsheet.worksheet, sheet_name)
+                logger.info(f"Found existing worksheet: {sheet_name}")
+            except gspread.exceptions.WorksheetNotFound:
+                worksheet = await self.call('write', spreadsheet.add_worksheet, title=sheet_name, rows=100, cols=20)
+                logger.info(f"Created new worksheet: {sheet_name}")
+            self._worksheets[key] = worksheet
+        return self._worksheets[key]
+
+    async def write(self, spreadsheet_id, sheet_name, rows):
+        """Queues rows for a worksheet and waits until they are written.
+
+        Rows queued for the same worksheet before the next flush share one request.
+        """
+        future = asyncio.get_running_loop().create_future()
+        rows_batch, futures = self._pending.setdefault((spreadsheet_id, sheet_name), ([], []))
+        rows_batch.extend(rows)
+        futures.append(future)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        # Keep going while writes arrive during a flush so none are left behind
+        while self._pending:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+
+    async def flush(self):
+        """Writes all pending rows, one batch per worksheet."""
+        pending, self._pending = self._pending, {}
+        for (spreadsheet_id, sheet_name), (rows, futures) in pending.items():
+            try:
+                worksheet = await self.open_worksheet(spreadsheet_id, sheet_name)
+                await self.call('write', worksheet.append_rows, rows,
+                                value_input_option='RAW', insert_data_option='INSERT_ROWS')
+                self._stats['batches'] += 1
+                self._stats['rows_written'] += len(rows)
+                logger.info(f"Wrote {len(rows)} rows from {len(futures)} writes to worksheet: {sheet_name}")
+            except Exception as e:
+                if get_status_code(e) in STALE_HANDLE_STATUS_CODES:
+                    # Reopen (or recreate) the worksheet on the next flush
+                    self._worksheets.pop((spreadsheet_id, sheet_name), None)
+                    self._spreadsheets.pop(spreadsheet_id, None)
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(len(rows))
+
+    async def close(self):
+        """Flushes pending rows and stops the scheduler."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+        logger.info(f"Sheets scheduler stats: {self.stats}")
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Returns the process-wide Sheets scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = SheetsWriteScheduler()
+    return _scheduler
+
+
+def flatten_rows(data):
+    """Converts a list of dictionaries into sheet rows, joining list values with commas."""
+    flat_values = []
+    for item in data:
+        flat_row = []
+        for value in item.values():
+            if isinstance(value, list):
+                flat_row.append(', '.join(map(str, value)))
+            else:
+                flat_row.append(value)
+        flat_values.append(flat_row)
+    return flat_values
+
+
+async def save_to_google_sheet(spreadsheet_id: str | None, sheet_name: str, data, scheduler=None,
+                               raise_errors=False):
     """Saves the scraped data to a Google Sheet.
 
     Args:
         spreadsheet_id (str): The ID of the Google Spreadsheet. If None, a new one is created.
         sheet_name (str): The name of the sheet within the Spreadsheet.
         data (list): The scraped data as a list of dictionaries.
+        scheduler (SheetsWriteScheduler, optional): Scheduler to write through.
+            Defaults to the shared one from ``get_scheduler()``.
+        raise_errors (bool, optional): Re-raise errors after logging them instead of
+            swallowing them.
 
     Returns:
         str or None: The Spreadsheet ID if a new spreadsheet was created, otherwise None.
     """
-    agcm = gspread_asyncio.AsyncioGspreadClientManager(get_creds)
+    scheduler = scheduler or get_scheduler()
+    created_id = None
     try:
-        agc = await agcm.authorize()
-        logger.info(f"Connected to Google Sheets: {agc}")
-
         if spreadsheet_id is None:
-            spreadsheet = await agc.create("Laptop Loot Data")
-            spreadsheet_id = spreadsheet.id # Get ID of the newly created spreadsheet
+            spreadsheet = await scheduler.create_spreadsheet("Laptop Loot Data")
+            spreadsheet_id = created_id = spreadsheet.id  # Get ID of the newly created spreadsheet
             logger.info(f"New Spreadsheet ID: {spreadsheet.id}")
             logger.info("Spreadsheet URL: https://docs.google.com/spreadsheets/d/{0}".format(spreadsheet.id))
-            logger.info("Open the URL in your browser to see gspread_asyncio in action!")
-            # Allow anyone with the URL to write to this spreadsheet.
-            await agc.insert_permission(spreadsheet.id, None, perm_type="anyone", role="writer")
             settings['SPREADSHEET_ID'] = spreadsheet_id
             save_settings(settings)
-        else:
-            spreadsheet = await agc.open_by_key(spreadsheet_id)
-            logger.info(f"Opened existing Spreadsheet: {spreadsheet.title}")
-        try:
-            worksheet = await spreadsheet.worksheet(sheet_name)
-            logger.info(f"Found existing worksheet: {sheet_name}")
-        except gspread.exceptions.WorksheetNotFound:
-            worksheet = await spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
-            logger.info(f"Created new worksheet: {sheet_name}")
-
-        # --- Resize worksheet if necessary ---
-        await resize_worksheet(worksheet, len(data), len(data[0]))
-        logger.info(f"Worksheet ID: {worksheet.id}")
-        values = [[item[key] for key in item] for item in data]
-        logger.info(f"Values: {values}")
-        # Append the data to the sheet
-        flat_values = []
-        for value in values:
-            flat_row = []
-            for item in value:
-                if isinstance(item, list):
-                    flat_row.append(', '.join(map(str, item)))
-                else:
-                    flat_row.append(item)
-            flat_values.append(flat_row)
-        # Append the data to the sheet
+        if not data:
+            logger.info("No data to save to Google Sheet")
+            return created_id
+
+        flat_values = flatten_rows(data)
         logger.info(f'Flat values: {flat_values}')
-        await worksheet.append_rows(flat_values, value_input_option='RAW')
+        await scheduler.write(spreadsheet_id, sheet_name, flat_values)
         logger.info(f"Data saved to Google Sheet: {sheet_name}")
-        logger.info("Spreadsheet URL: https://docs.google.com/spreadsheets/d/{0}".format(spreadsheet.id))
+        logger.info("Spreadsheet URL: https://docs.google.com/spreadsheets/d/{0}".format(spreadsheet_id))
     except Exception as e:
         logger.error(f"Error saving data to Google Sheet: {e}")
         logger.error(traceback.format_exc())
-
-async def resize_worksheet(worksheet, rows_needed, cols_needed):
-    """Resizes the worksheet if there are not enough rows or columns."""
-    try:
-        # Get current worksheet dimensions
-        current_rows = len(await worksheet.get_all_values())
-        current_cols = len(await worksheet.row_values(1))
-
-        # Resize if needed
-        if current_rows < rows_needed:
-            await worksheet.add_rows(rows_needed - current_rows)
-            logger.info(f"Added {rows_needed - current_rows} rows to worksheet.")
-        if current_cols < cols_needed:
-            await worksheet.add_cols(cols_needed - current_cols)
-            logger.info(f"Added {cols_needed - current_cols} columns to worksheet.")
-
-    except Exception as e:
-        logger.error(f"Error resizing worksheet: {e}")
-        logger.error(traceback.format_exc())
\ No newline at end of file
+        if raise_errors:
+            raise
+    return created_id
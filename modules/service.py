@@ -0,0 +1,297 @@
+# modules/service.py
+import asyncio
+import itertools
+import json
+import os
+import time
+import traceback
+from argparse import Namespace
+
+from loguru import logger
+from playwright.async_api import async_playwright
+
+from modules import google_sheets
+from modules.cpu_offload import LoopLagMonitor, get_cpu_pool
+from modules.google_sheets import save_to_google_sheet, get_scheduler
+from modules.web_scraping import scrape_ebay_listings
+
+# --- Job options a client may override (same names as the command-line options) ---
+JOB_OPTIONS = ('pages', 'lang', 'country', 'category', 'ram', 'screen_size', 'cpu', 'condition', 'price_order')
+DEFAULT_SOCKET = 'laptoploot.sock'
+
+
+class ScrapeJob:
+    """A queued scrape request and the stream of events produced while running it."""
+
+    def __init__(self, job_id, query, args, save=True, sheet_name=None):
+        self.id = job_id
+        self.query = query
+        self.args = args
+        self.save = save
+        self.sheet_name = sheet_name
+        self.events = asyncio.Queue()
+        self.submitted = time.monotonic()
+
+
+class ScraperService:
+    """Keeps the browser, NLP models and Sheets client warm between scrape jobs.
+
+    Jobs are queued and run by one worker per pooled browser context. A context
+    keeps its cookies between jobs, so eBay's language and location are only set
+    when a job asks for a different language/country pair than the context's
+    last one; the search, category and filter steps still run for every job. The first job on each context is
+    reported as "cold", later ones as "warm".
+
+    Args:
+        args (Namespace): Default search and filter options for jobs.
+        workers (int): Number of pooled browser contexts (concurrent jobs).
+        queue_size (int): Maximum number of jobs waiting for a context.
+    """
+
+    def __init__(self, args, workers=2, queue_size=100):
+        self.args = args
+        self.workers = workers
+        self.jobs = asyncio.Queue(maxsize=queue_size)
+        self.latencies = {kind: {'jobs': 0, 'total_seconds': 0.0, 'max_seconds': None} for kind in ('cold', 'warm')}
+        self.startup_seconds = None
+        self._job_ids = itertools.count(1)
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._tasks = []
+        self._spreadsheet_lock = asyncio.Lock()
+        self.lag_monitor = LoopLagMonitor(args.lag_threshold)
+
+    async def start(self):
+        started = time.monotonic()
+        logger.info("Starting scraper service...")
+        self.lag_monitor.start()
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        for _ in range(self.workers):
+            context = await self._browser.new_context(
+                locale=self.args.lang,
+                timezone_id=self.args.timezone,
+                geolocation=self.args.location,
+                permissions=["geolocation"])
+            self._contexts.append({'context': context, 'jobs': 0, 'locale': None})
+        # Authorize Sheets up front so the first job does not pay for it. Jobs that
+        # don't save still work without Sheets; saving jobs report the error.
+        try:
+            await get_scheduler().get_client()
+        except Exception as e:
+            logger.error(f"Could not authorize Google Sheets, saving jobs will fail: {e}")
+        self._tasks = [asyncio.create_task(self._worker(slot)) for slot in self._contexts]
+        self.startup_seconds = time.monotonic() - started
+        logger.info(f"Scraper service ready in {self.startup_seconds:.2f}s with {self.workers} contexts")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await get_scheduler().close()
+        await self.lag_monitor.stop()
+        for slot in self._contexts:
+            await slot['context'].close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        logger.info(f"Scraper service stopped: {self.stats()}")
+        get_cpu_pool().shutdown()
+
+    def submit(self, request):
+        """Creates a job from a client request and queues it.
+
+        Raises:
+            ValueError: If the request has no query or an unknown option.
+            asyncio.QueueFull: If too many jobs are already waiting.
+        """
+        query = request.get('query')
+        if not query:
+            raise ValueError("Job request needs a 'query'")
+        options = request.get('options', {})
+        unknown = set(options) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+        args = Namespace(**{**vars(self.args), **options})
+        job = ScrapeJob(next(self._job_ids), query, args,
+                        save=request.get('save', True), sheet_name=request.get('sheet_name'))
+        self.jobs.put_nowait(job)
+        logger.info(f"Queued job {job.id}: {query}")
+        return job
+
+    def stats(self):
+        """Startup time, queue depth and per-job latency for cold and warm runs."""
+        stats = {'startup_seconds': self.startup_seconds, 'queued': self.jobs.qsize()}
+        for kind, latency in self.latencies.items():
+            stats[kind] = {
+                'jobs': latency['jobs'],
+                'mean_seconds': latency['total_seconds'] / latency['jobs'] if latency['jobs'] else None,
+                'max_seconds': latency['max_seconds'],
+            }
+        stats['sheets'] = get_scheduler().stats
+        stats['parse_pool'] = get_cpu_pool().stats
+        stats['loop_lag'] = self.lag_monitor.stats
+        return stats
+
+    async def _worker(self, slot):
+        while True:
+            job = await self.jobs.get()
+            try:
+                await self._run_job(job, slot)
+            except Exception as e:
+                # Keep the worker (and its context) alive for the next job
+                logger.error(f"Worker failed on job {job.id}: {e}")
+                logger.error(traceback.format_exc())
+            finally:
+                self.jobs.task_done()
+
+    async def _run_job(self, job, slot):
+        started = time.monotonic()
+        kind = 'warm' if slot['jobs'] else 'cold'
+        locale = (job.args.lang, job.args.country)
+        page = None
+
+        async def on_page(listings):
+            await job.events.put({'event': 'listings', 'job_id': job.id, 'listings': listings})
+
+        try:
+            await job.events.put({'event': 'started', 'job_id': job.id, 'run': kind})
+            page = await slot['context'].new_page()
+            # The cookies only hold the last language/country applied on this context
+            set_locale = slot['locale'] != locale
+            if set_locale:
+                slot['locale'] = None  # Unknown until the locale steps finish
+            laptops_data = await scrape_ebay_listings(page, job.query, job.args, on_page=on_page,
+                                                      set_locale=set_locale)
+            slot['locale'] = locale
+            saved, save_error = None, None
+            if job.save and laptops_data:
+                sheet_name = job.sheet_name or google_sheets.settings.get(
+                    'SHEET_NAME', os.getenv("SHEET_NAME")) or "eBay Laptops"
+                try:
+                    spreadsheet_id = await self._get_spreadsheet_id(sheet_name)
+                    await save_to_google_sheet(spreadsheet_id, sheet_name, laptops_data, raise_errors=True)
+                    saved = True
+                except Exception as e:
+                    saved, save_error = False, str(e)
+            latency = time.monotonic() - started
+            self._record_latency(kind, latency)
+            logger.info(f"Job {job.id} finished ({kind}) in {latency:.2f}s")
+            await job.events.put({
+                'event': 'done',
+                'job_id': job.id,
+                'run': kind,
+                'listings': len(laptops_data),
+                'saved': saved,
+                'save_error': save_error,
+                'latency_seconds': latency,
+                'queue_seconds': started - job.submitted,
+            })
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            logger.error(traceback.format_exc())
+            await job.events.put({'event': 'error', 'job_id': job.id, 'error': str(e)})
+        finally:
+            slot['jobs'] += 1
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.warning(f"Could not close page for job {job.id}: {e}")
+
+    def _record_latency(self, kind, latency):
+        stats = self.latencies[kind]
+        stats['jobs'] += 1
+        stats['total_seconds'] += latency
+        stats['max_seconds'] = latency if stats['max_seconds'] is None else max(stats['max_seconds'], latency)
+
+    async def _get_spreadsheet_id(self, sheet_name):
+        """Returns the configured spreadsheet ID, creating the spreadsheet once if there is none.
+
+        The lock keeps concurrent first jobs from each creating a spreadsheet.
+        """
+        async with self._spreadsheet_lock:
+            spreadsheet_id = google_sheets.settings.get('SPREADSHEET_ID', os.getenv("SPREADSHEET_ID")) or None
+            if spreadsheet_id is None:
+                spreadsheet_id = await save_to_google_sheet(None, sheet_name, [], raise_errors=True)
+            return spreadsheet_id
+
+    async def handle_client(self, reader, writer):
+        """Reads one JSON request line and streams JSON event lines back.
+
+        Requests are ``{"query": ..., "options": {...}}`` to scrape, or
+        ``{"command": "stats"}`` for service statistics.
+        """
+        try:
+            request = json.loads(await reader.readline())
+            if request.get('command') == 'stats':
+                await self._send(writer, {'event': 'stats', 'stats': self.stats()})
+                return
+            try:
+                job = self.submit(request)
+            except (ValueError, asyncio.QueueFull) as e:
+                await self._send(writer, {'event': 'error', 'error': str(e) or "Job queue is full"})
+                return
+            await self._send(writer, {'event': 'queued', 'job_id': job.id, 'position': self.jobs.qsize()})
+            while True:
+                event = await job.events.get()
+                await self._send(writer, event)
+                if event['event'] in ('done', 'error'):
+                    break
+        except (ValueError, AttributeError) as e:
+            # ValueError covers bad JSON and request lines over the stream limit
+            try:
+                await self._send(writer, {'event': 'error', 'error': f"Invalid request: {e}"})
+            except ConnectionError:
+                logger.warning("Client disconnected before the error was sent")
+        except ConnectionError:
+            logger.warning("Client disconnected before the job finished")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _send(writer, event):
+        writer.write(json.dumps(event, default=str).encode() + b'\n')
+        await writer.drain()
+
+
+async def serve(args):
+    """Runs the scraper service until interrupted."""
+    service = ScraperService(args, workers=args.workers)
+    try:
+        await service.start()
+        if args.port is not None:
+            server = await asyncio.start_server(service.handle_client, args.host, args.port)
+            logger.info(f"Listening on {args.host}:{args.port}")
+        else:
+            if os.path.exists(args.socket):
+                os.remove(args.socket)
+            server = await asyncio.start_unix_server(service.handle_client, args.socket)
+            logger.info(f"Listening on {args.socket}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if args.port is None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+async def submit_job(request, socket_path=DEFAULT_SOCKET, host=None, port=None):
+    """Sends a request to a running service and yields the events it streams back."""
+    if port is not None:
+        reader, writer = await asyncio.open_connection(host, port)
+    else:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        while line := await reader.readline():
+            yield json.loads(line)
+    finally:
+        writer.close()
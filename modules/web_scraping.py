@@ -113,13 +113,15 @@ async def apply_filter(page, filter_name, filter_values, suffix=""):
             logger.warning(f"Timeout or error applying filter '{filter_name}' with values: {filter_values}")
 
 
-async def search_ebay(page, query, args):
+async def search_ebay(page, query, args, set_locale=True):
     await page.goto("https://www.ebay.com/")  # Go to the main page first
     await page.wait_for_load_state('networkidle')  # Wait for main page to be fully interactive
 
-    await change_language(page, args.lang)  # Ensure English language
-    await change_location(page, args.country)  # Set location to United States
-    await page.wait_for_load_state('networkidle')
+    # Language and location live in cookies, so a reused browser context can skip them
+    if set_locale:
+        await change_language(page, args.lang)  # Ensure English language
+        await change_location(page, args.country)  # Set location to United States
+        await page.wait_for_load_state('networkidle')
     await choose_category(page, args.category) # Set category to PC Laptops
     await page.wait_for_load_state('networkidle')
     if args:
@@ -177,9 +179,23 @@ async def scrape_page(page):
     return laptops_data
 
 
-async def scrape_ebay_listings(page, search_query, args):
+async def scrape_ebay_listings(page, search_query, args, on_page=None, set_locale=True):
+    """Searches eBay and scrapes every result page.
+
+    Args:
+        page (Page): The Playwright page object.
+        search_query (str): The eBay search query.
+        args (Namespace): Search and filter options (see main.py).
+        on_page (callable, optional): Coroutine called with each page's listings
+            as soon as the page is scraped.
+        set_locale (bool, optional): Set eBay's language and location first. Pass
+            False when the browser context already has them from an earlier search.
+
+    Returns:
+        list: The scraped listings from all pages.
+    """
     logger.info(f"Scraping {search_query}...")
-    await search_ebay(page, search_query, args)
+    await search_ebay(page, search_query, args, set_locale)
     all_laptops_data = []
     page_num = 1
     while True:
@@ -188,6 +204,8 @@ async def scrape_ebay_listings(page, search_query, args):
         print(f"Scraping page {page_num}...")
         laptops_data = await scrape_page(page)
         all_laptops_data.extend(laptops_data)
+        if on_page is not None:
+            await on_page(laptops_data)
         if not await navigate_to_next_page(page):
             break
         page_num += 1
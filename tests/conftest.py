@@ -0,0 +1,6 @@
+import os
+import sys
+
+# modules/google_sheets.py refuses to import without a service account path
+os.environ.setdefault("SERVICE_ACCOUNT_FILE", "service_account.json")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,72 @@
+# tests/fake_sheets.py
+import json
+
+import gspread
+import requests
+
+
+def api_error(status_code, message="Quota exceeded"):
+    """Builds the gspread APIError a real Sheets response with ``status_code`` would raise."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps({"error": {"code": status_code, "message": message}}).encode()
+    return gspread.exceptions.APIError(response)
+
+
+class FakeWorksheet:
+    """Worksheet whose ``append_rows`` fails ``failures`` times with ``status_code``
+    (or with ``error``, an exception instance, when given)."""
+
+    def __init__(self, title, failures=0, status_code=429, error=None):
+        self.title = title
+        self.failures = failures
+        self.status_code = status_code
+        self.error = error
+        self.append_calls = []
+        self.rows = []
+
+    async def append_rows(self, values, **kwargs):
+        self.append_calls.append(values)
+        if self.failures:
+            self.failures -= 1
+            raise self.error or api_error(self.status_code)
+        self.rows.extend(values)
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, worksheets):
+        self.id = spreadsheet_id
+        self.title = f"Spreadsheet {spreadsheet_id}"
+        self.worksheets = worksheets
+
+    async def worksheet(self, title):
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    async def add_worksheet(self, title, rows, cols):
+        self.worksheets[title] = FakeWorksheet(title)
+        return self.worksheets[title]
+
+
+class FakeClient:
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+        self.open_calls = 0
+
+    async def open_by_key(self, spreadsheet_id):
+        self.open_calls += 1
+        return FakeSpreadsheet(spreadsheet_id, self.worksheets)
+
+
+class FakeClientManager:
+    """Stands in for ``SchedulerClientManager``; worksheets fail with 429 ``failures`` times."""
+
+    def __init__(self, failures=0, status_code=429, error=None):
+        self.worksheet = FakeWorksheet("eBay Laptops", failures, status_code, error)
+        self.client = FakeClient({self.worksheet.title: self.worksheet})
+        self.authorize_calls = 0
+
+    async def authorize(self):
+        self.authorize_calls += 1
+        return self.client
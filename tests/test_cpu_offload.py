@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import cpu_offload
+from modules.cpu_offload import CpuPool, LoopLagMonitor, configure_cpu_pool
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that records the most tasks submitted and not yet finished."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def measure_lag(block):
+    async def run():
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await block()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor.stats
+
+    return asyncio.run(run())
+
+
+def test_blocking_call_on_loop_is_reported():
+    async def block():
+        time.sleep(0.2)
+
+    stats = measure_lag(block)
+    assert stats['blocked_spans'] == 1
+    assert stats['max_lag_seconds'] >= 0.15
+
+
+def test_offloaded_call_is_not_reported():
+    pool = CpuPool('thread', workers=1, queue_size=0)
+
+    async def block():
+        await pool.run(time.sleep, 0.2)
+
+    try:
+        stats = measure_lag(block)
+    finally:
+        pool.shutdown()
+    assert stats['blocked_spans'] == 0
+    assert stats['checks'] > 5
+
+
+def test_pool_bounds_tasks_in_flight():
+    pool = CpuPool('thread', workers=2, queue_size=1)
+    executor = pool._executor = CountingExecutor(max_workers=2)
+
+    async def run():
+        return await asyncio.gather(*(pool.run(time.sleep, 0.02) for _ in range(10)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert executor.max_in_flight == 3
+    assert pool.stats['tasks'] == 10
+
+
+def test_configure_rejects_unknown_pool_kind(monkeypatch):
+    monkeypatch.setattr(cpu_offload, '_pool', None)
+    with pytest.raises(ValueError, match='bogus'):
+        configure_cpu_pool('bogus')
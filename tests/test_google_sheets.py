@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import gspread
+import pytest
+import requests
+
+from fake_sheets import FakeClientManager, api_error
+from modules.google_sheets import RequestBudget, SchedulerClientManager, SheetsWriteScheduler, save_to_google_sheet
+
+
+def make_scheduler(manager, **kwargs):
+    kwargs = {'flush_delay': 0.01, 'base_delay': 0.01, 'jitter': 0.0, **kwargs}
+    return SheetsWriteScheduler(manager, **kwargs)
+
+
+def test_retries_429_with_backoff_and_counts_them():
+    manager = FakeClientManager(failures=2)
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        await save_to_google_sheet('sheet-id', 'eBay Laptops', [{'Name': 'ThinkPad', 'RAM': [16, 32]}],
+                                   scheduler=scheduler)
+        await scheduler.close()
+
+    asyncio.run(run())
+    assert manager.worksheet.rows == [['ThinkPad', '16, 32']]
+    assert len(manager.worksheet.append_calls) == 3
+    stats = scheduler.stats
+    assert stats['retries'] == 2
+    assert stats['failures'] == 0
+    assert stats['batches'] == 1
+    assert stats['rows_written'] == 1
+
+
+def test_gives_up_after_max_retries():
+    manager = FakeClientManager(failures=10)
+    scheduler = make_scheduler(manager, max_retries=3)
+
+    async def run():
+        with pytest.raises(gspread.exceptions.APIError):
+            await scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']])
+
+    asyncio.run(run())
+    assert len(manager.worksheet.append_calls) == 4
+    assert scheduler.stats['retries'] == 3
+    assert scheduler.stats['failures'] == 1
+    assert manager.worksheet.rows == []
+
+
+def test_does_not_retry_client_errors():
+    manager = FakeClientManager(failures=1, status_code=400)
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        with pytest.raises(gspread.exceptions.APIError):
+            await scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']])
+
+    asyncio.run(run())
+    assert scheduler.stats['retries'] == 0
+    assert scheduler.stats['failures'] == 1
+
+
+def test_concurrent_saves_to_one_worksheet_share_a_request():
+    manager = FakeClientManager()
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        await asyncio.gather(
+            save_to_google_sheet('sheet-id', 'eBay Laptops', [{'Name': 'ThinkPad'}], scheduler=scheduler),
+            save_to_google_sheet('sheet-id', 'eBay Laptops', [{'Name': 'XPS'}], scheduler=scheduler),
+        )
+
+    asyncio.run(run())
+    assert manager.worksheet.append_calls == [[['ThinkPad'], ['XPS']]]
+    assert scheduler.stats['batches'] == 1
+    assert manager.authorize_calls == 1
+
+
+def test_request_budget_waits_when_limit_is_reached():
+    budget = RequestBudget(limit=2, window=0.2)
+
+    async def run():
+        waits = [await budget.acquire() for _ in range(3)]
+        return waits
+
+    started = time.monotonic()
+    waits = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] > 0
+    assert time.monotonic() - started >= 0.19
+
+
+def test_does_not_resend_append_after_server_error():
+    # A 503 may arrive after the rows were appended; resending could duplicate them
+    manager = FakeClientManager(failures=1, status_code=503)
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        with pytest.raises(gspread.exceptions.APIError):
+            await scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']])
+
+    asyncio.run(run())
+    assert len(manager.worksheet.append_calls) == 1
+    assert scheduler.stats['retries'] == 0
+
+
+def test_does_not_resend_append_after_read_timeout():
+    manager = FakeClientManager(failures=1, error=requests.ReadTimeout())
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        with pytest.raises(requests.ReadTimeout):
+            await scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']])
+
+    asyncio.run(run())
+    assert len(manager.worksheet.append_calls) == 1
+
+
+def test_resends_append_after_connection_error():
+    manager = FakeClientManager(failures=1, error=requests.ConnectionError())
+    scheduler = make_scheduler(manager)
+
+    asyncio.run(scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']]))
+    assert manager.worksheet.rows == [['ThinkPad']]
+    assert scheduler.stats['retries'] == 1
+
+
+def test_stale_worksheet_is_reopened_after_client_error():
+    manager = FakeClientManager(failures=1, status_code=404)
+    scheduler = make_scheduler(manager)
+
+    async def run():
+        with pytest.raises(gspread.exceptions.APIError):
+            await scheduler.write('sheet-id', 'eBay Laptops', [['ThinkPad']])
+        await scheduler.write('sheet-id', 'eBay Laptops', [['XPS']])
+
+    asyncio.run(run())
+    assert manager.client.open_calls == 2
+    assert manager.worksheet.rows == [['XPS']]
+
+
+def test_client_manager_raises_rate_limit_errors(monkeypatch):
+    calls = []
+
+    class RateLimitedClient:
+        def open_by_key(self, key):
+            calls.append(key)
+            raise api_error(429)
+
+    monkeypatch.setattr(gspread, 'authorize', lambda creds: RateLimitedClient())
+
+    async def run():
+        agc = await SchedulerClientManager(lambda: None).authorize()
+        with pytest.raises(gspread.exceptions.APIError):
+            await agc.open_by_key('sheet-id')
+
+    asyncio.run(run())
+    assert calls == ['sheet-id']
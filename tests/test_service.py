@@ -0,0 +1,158 @@
+import asyncio
+import json
+from argparse import Namespace
+
+import pytest
+
+# modules.service imports the scraper, which loads the spaCy model at import time
+pytest.importorskip('en_core_web_sm')
+pytest.importorskip('playwright')
+
+from modules import service  # noqa: E402
+
+
+class StubPage:
+    async def close(self):
+        pass
+
+
+class StubContext:
+    async def new_page(self):
+        return StubPage()
+
+
+def make_args(**overrides):
+    args = {'pages': None, 'lang': 'en-EN', 'country': 'United States', 'timezone': 'US/Eastern',
+            'location': None, 'lag_threshold': 0.1}
+    return Namespace(**{**args, **overrides})
+
+
+def start_workers(scraper, workers=1):
+    # What ScraperService.start() does, minus Chromium and Sheets
+    scraper._contexts = [{'context': StubContext(), 'jobs': 0, 'locale': None} for _ in range(workers)]
+    scraper._tasks = [asyncio.create_task(scraper._worker(slot)) for slot in scraper._contexts]
+
+
+@pytest.fixture
+def scraped(monkeypatch):
+    """Replaces the eBay scraper; records (query, country, set_locale) per job."""
+    calls = []
+
+    async def fake_scrape(page, search_query, args, on_page=None, set_locale=True):
+        calls.append((search_query, args.country, set_locale))
+        listings = [{'Name': search_query, 'Price': ['$100.00']}]
+        await on_page(listings)
+        return listings
+
+    monkeypatch.setattr(service, 'scrape_ebay_listings', fake_scrape)
+    return calls
+
+
+async def run_job(scraper, request):
+    job = scraper.submit(request)
+    events = []
+    while not events or events[-1]['event'] not in ('done', 'error'):
+        events.append(await job.events.get())
+    return events
+
+
+def test_submit_rejects_missing_query():
+    scraper = service.ScraperService(make_args())
+    with pytest.raises(ValueError, match='query'):
+        scraper.submit({'options': {}})
+
+
+def test_submit_rejects_unknown_options():
+    scraper = service.ScraperService(make_args())
+    with pytest.raises(ValueError, match='bogus'):
+        scraper.submit({'query': 'thinkpad', 'options': {'bogus': 1}})
+
+
+def test_submit_raises_when_queue_is_full():
+    async def run():
+        scraper = service.ScraperService(make_args(), queue_size=1)
+        scraper.submit({'query': 'thinkpad'})
+        with pytest.raises(asyncio.QueueFull):
+            scraper.submit({'query': 'xps'})
+
+    asyncio.run(run())
+
+
+def test_handle_client_streams_job_events(scraped, tmp_path):
+    socket_path = str(tmp_path / 'service.sock')
+
+    async def run():
+        scraper = service.ScraperService(make_args())
+        start_workers(scraper)
+        server = await asyncio.start_unix_server(scraper.handle_client, socket_path)
+        async with server:
+            request = {'query': 'thinkpad', 'options': {'pages': 1}, 'save': False}
+            return [event async for event in service.submit_job(request, socket_path)]
+
+    events = asyncio.run(run())
+    assert [event['event'] for event in events] == ['queued', 'started', 'listings', 'done']
+    assert events[1]['run'] == 'cold'
+    assert events[2]['listings'] == [{'Name': 'thinkpad', 'Price': ['$100.00']}]
+    assert events[3]['listings'] == 1
+    assert events[3]['saved'] is None
+
+
+@pytest.mark.parametrize('line', [b'not json\n', b'{"query": "' + b'x' * 70000 + b'"}\n'],
+                         ids=['bad-json', 'over-stream-limit'])
+def test_handle_client_rejects_invalid_request(tmp_path, line):
+    socket_path = str(tmp_path / 'service.sock')
+
+    async def run():
+        scraper = service.ScraperService(make_args())
+        server = await asyncio.start_unix_server(scraper.handle_client, socket_path)
+        async with server:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(line)
+            await writer.drain()
+            event = json.loads(await reader.readline())
+            writer.close()
+            return event
+
+    event = asyncio.run(run())
+    assert event['event'] == 'error'
+    assert 'Invalid request' in event['error']
+
+
+def test_locale_is_reapplied_after_another_country(scraped):
+    async def run():
+        scraper = service.ScraperService(make_args(), workers=1)
+        start_workers(scraper)
+        for country in ('United States', 'Germany', 'United States', 'United States'):
+            await run_job(scraper, {'query': 'thinkpad', 'options': {'country': country}, 'save': False})
+        return scraper
+
+    scraper = asyncio.run(run())
+    assert [set_locale for _, _, set_locale in scraped] == [True, True, True, False]
+    assert scraper.stats()['cold']['jobs'] == 1
+    assert scraper.stats()['warm']['jobs'] == 3
+
+
+def test_concurrent_first_saves_create_one_spreadsheet(scraped, monkeypatch):
+    monkeypatch.delitem(service.google_sheets.settings, 'SPREADSHEET_ID', raising=False)
+    monkeypatch.delenv('SPREADSHEET_ID', raising=False)
+    created, saved_to = [], []
+
+    async def fake_save(spreadsheet_id, sheet_name, data, scheduler=None, raise_errors=False):
+        if spreadsheet_id is None:
+            await asyncio.sleep(0.01)
+            created.append(sheet_name)
+            monkeypatch.setitem(service.google_sheets.settings, 'SPREADSHEET_ID', 'new-sheet')
+            return 'new-sheet'
+        saved_to.append(spreadsheet_id)
+
+    monkeypatch.setattr(service, 'save_to_google_sheet', fake_save)
+
+    async def run():
+        scraper = service.ScraperService(make_args(), workers=2)
+        start_workers(scraper, workers=2)
+        return await asyncio.gather(*(run_job(scraper, {'query': query}) for query in ('thinkpad', 'xps')))
+
+    results = asyncio.run(run())
+    assert len(created) == 1
+    assert saved_to == ['new-sheet', 'new-sheet']
+    assert all(events[-1]['saved'] is True for events in results)